@@ -61,6 +61,17 @@ class MyEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, o)
 
 
+def pickle_dump(obj, file_name):
+    """
+    Pickle with the highest protocol available. From protocol 5 (Python 3.8)
+    on, numpy arrays such as the replay buffer are written straight from
+    their memory instead of through an intermediate bytes copy. The file
+    still loads with a plain `pickle.load`.
+    """
+    with open(file_name, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 def mkdir_p(path):
     try:
         os.makedirs(path)
@@ -203,7 +214,7 @@ class Logger(object):
             import joblib
             joblib.dump(data, file_name, compress=3)
         elif mode == 'pickle':
-            pickle.dump(data, open(file_name, "wb"))
+            pickle_dump(data, file_name)
         elif mode == 'dill':
             dill.dump(data, file_name)
         else:
@@ -324,27 +335,38 @@ class Logger(object):
         del self._prefixes[-1]
         self._prefix_str = ''.join(self._prefixes)
 
+    def will_save_itr_params(self, itr):
+        """
+        :return: False if `save_itr_params(itr, ...)` would not write
+        anything, so the params need not be gathered.
+        """
+        if not self._snapshot_dir or self._snapshot_mode == 'none':
+            return False
+        if self._snapshot_mode == 'gap':
+            return itr % self._snapshot_gap == 0
+        return True
+
     def save_itr_params(self, itr, params):
         if self._snapshot_dir:
             if self._snapshot_mode == 'all':
                 file_name = osp.join(self._snapshot_dir, 'itr_%d.pkl' % itr)
-                pickle.dump(params, open(file_name, "wb"))
+                pickle_dump(params, file_name)
             elif self._snapshot_mode == 'last':
                 # override previous params
                 file_name = osp.join(self._snapshot_dir, 'params.pkl')
-                pickle.dump(params, open(file_name, "wb"))
+                pickle_dump(params, file_name)
             elif self._snapshot_mode == "gap":
                 if itr % self._snapshot_gap == 0:
                     file_name = osp.join(self._snapshot_dir,
                                          'itr_%d.pkl' % itr)
-                    pickle.dump(params, open(file_name, "wb"))
+                    pickle_dump(params, file_name)
             elif self._snapshot_mode == "gap_and_last":
-                if itr % self._snapshot_gap == 0:
-                    file_name = osp.join(self._snapshot_dir,
-                                         'itr_%d.pkl' % itr)
-                    pickle.dump(params, open(file_name, "wb"))
                 file_name = osp.join(self._snapshot_dir, 'params.pkl')
-                pickle.dump(params, open(file_name, "wb"))
+                pickle_dump(params, file_name)
+                if itr % self._snapshot_gap == 0:
+                    # Same content, no need to pickle twice
+                    shutil.copyfile(file_name, osp.join(self._snapshot_dir,
+                                                        'itr_%d.pkl' % itr))
             elif self._snapshot_mode == 'none':
                 pass
             else:
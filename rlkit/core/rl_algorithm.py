@@ -1,14 +1,19 @@
 import abc
-import pickle
+import copy
+import os
+import threading
 import time
-from collections import OrderedDict
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import gtimer as gt
 import numpy as np
+from gym.spaces import Box
 
 from rlkit.core import eval_util, logger
 from rlkit.data_management.env_replay_buffer import EnvReplayBuffer
 from rlkit.data_management.path_builder import PathBuilder
+from rlkit.envs.vec_env import SyncVectorEnv
 from rlkit.policies.base import ExplorationPolicy
 from rlkit.samplers.in_place import InPlacePathSampler
 import rlkit.torch.pytorch_util as ptu
@@ -17,15 +22,21 @@ try:
 except ImportError:
     MPI = None
 import torch
+import torch.distributed as dist
 from rlkit.torch.relational.relational_util import get_masks
 
 
+# Stamps of the epoch loop, timed with RLAlgorithm._stamp
+OUTER_LOOP_STAMPS = ('sample', 'train', 'eval')
+
+
 class RLAlgorithm(metaclass=abc.ABCMeta):
     def __init__(
             self,
             env,
             exploration_policy: ExplorationPolicy,
             training_env=None,
+            env_fn=None,
             num_epochs=100,
             num_steps_per_epoch=10000,
             num_steps_per_eval=1000,
@@ -49,6 +60,9 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             num_gpus=1,
             num_epochs_per_eval=10,
             num_epochs_per_param_save=100,
+            num_envs=1,
+            async_sampling=False,
+            num_fused_batches=1,
             **kwargs
     ):
         """
@@ -59,6 +73,9 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         :param training_env: Environment used by the algorithm. By default, a
         copy of `env` will be made for training, so that training and
         evaluation are completely independent.
+        :param env_fn: Optional callable returning a fresh environment. If
+        given, it is used to create `training_env` (when not passed) and the
+        extra envs for `num_envs` > 1 instead of copying `env`.
         :param num_epochs:
         :param num_steps_per_epoch:
         :param num_steps_per_eval:
@@ -80,18 +97,52 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         :param collection_mode: String determining how training happens
          - 'online': Train after every step taken in the environment.
          - 'batch': Train after every epoch.
+        :param num_envs: Number of copies of `training_env` to step in
+        lock-step. With more than one env, a single batched policy forward
+        serves all envs and each epoch takes ceil(num_steps_per_epoch /
+        num_envs) vectorized steps. Assigning a new `training_env` replaces
+        all of them with copies of the new env.
+        :param async_sampling: Only for batch training mode. If True, collect
+        the samples of an epoch in a background thread while training on the
+        data already in the replay buffer. 'Sample Time' then only counts the
+        wait for that thread, 'Background Sample Time' its full run time.
+        :param num_fused_batches: Number of training batches drawn from the
+        replay buffer with a single `random_batch` call (and copied to the
+        device at once). Each update still uses its own `batch_size` batch.
         """
         assert collection_mode in ['online', 'batch']
         if collection_mode == 'batch':
             assert num_updates_per_epoch is not None
+        assert not async_sampling or collection_mode == 'batch', (
+            "async_sampling is only supported by the 'batch' collection_mode"
+        )
 
-        self.training_env = training_env or pickle.loads(pickle.dumps(env))
+        def make_training_env():
+            if env_fn is not None:
+                return env_fn()
+            return copy.deepcopy(env)
+
+        self.render = render
+        self.training_env = training_env or make_training_env()
         self.exploration_policy = exploration_policy
         self.num_epochs = num_epochs
         self.num_env_steps_per_epoch = num_steps_per_epoch
         self.num_steps_per_eval = num_steps_per_eval
+        self.num_envs = num_envs
+        self._vec_env = None
+        if num_envs > 1:
+            self._vec_env = SyncVectorEnv([self.training_env] + [
+                env_fn() if env_fn is not None
+                else copy.deepcopy(self.training_env)
+                for _ in range(num_envs - 1)
+            ])
+        self._num_env_step_calls_per_epoch = int(
+            np.ceil(self.num_env_steps_per_epoch / num_envs)
+        )
         if collection_mode == 'online':
-            self.num_updates_per_train_call = num_updates_per_env_step
+            # Keep the number of updates per env step fixed when stepping
+            # several envs per call.
+            self.num_updates_per_train_call = num_updates_per_env_step * num_envs
         else:
             self.num_updates_per_train_call = num_updates_per_epoch
         self.batch_size = batch_size
@@ -99,7 +150,6 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         self.discount = discount
         self.replay_buffer_size = replay_buffer_size
         self.reward_scale = reward_scale
-        self.render = render
         self.collection_mode = collection_mode
         self.save_replay_buffer = save_replay_buffer
         self.save_algorithm = save_algorithm
@@ -118,7 +168,7 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             )
         self.eval_policy = eval_policy
         self.eval_sampler = eval_sampler
-        self.eval_statistics = OrderedDict()
+        self.eval_statistics = {}
         self.need_to_update_eval_statistics = True
 
         self.action_space = env.action_space
@@ -136,16 +186,45 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         self._n_rollouts_total = 0
         self._do_train_time = 0
         self._epoch_start_time = None
+        # Wall-clock time spent in the sample/train/eval phases this epoch
+        self._epoch_time_accum = defaultdict(float)
+        self._last_stamp_time = None
+        self._previous_eval_time = 0
+        # gtimer stamp name -> tabular key
+        self._stamp_titles = {}
         self._algo_start_time = None
         self._old_table_keys = None
-        self._current_path_builder = PathBuilder()
+        self._reward_buf = np.empty(1, dtype=np.float64)
+        self._terminal_buf = np.empty(1, dtype=bool)
+        self._path_builder_spec = self._get_path_builder_spec()
+        self._current_path_builder = self._new_path_builder()
+        self._vec_path_builders = [
+            self._new_path_builder() for _ in range(num_envs)
+        ]
         self._exploration_paths = []
         self.post_epoch_funcs = []
         self.save_extra_data_interval = save_extra_data_interval
-
-        # MPI stuff
-        if MPI and ptu.get_mode():
-            self.gpu_id = MPI.COMM_WORLD.Get_rank()%num_gpus
+        self.async_sampling = async_sampling
+        self.num_fused_batches = num_fused_batches
+        self._init_thread_pools()
+
+        # Distributed stuff. Processes launched with torch.distributed.launch
+        # (WORLD_SIZE > 1) sync gradients with torch.distributed, otherwise
+        # fall back to MPI.
+        self.use_torch_distributed = int(os.environ.get("WORLD_SIZE", 1)) > 1
+        if self.use_torch_distributed:
+            if not dist.is_initialized():
+                dist.init_process_group(
+                    backend="nccl" if ptu.get_mode() else "gloo",
+                    init_method="env://",
+                )
+            if ptu.get_mode():
+                self.gpu_id = int(os.environ["LOCAL_RANK"])
+                ptu.set_device(device_id=self.gpu_id, device_type="gpu")
+        self._rank = get_rank()
+        self._is_rank0 = self._rank == 0
+        if not self.use_torch_distributed and MPI and ptu.get_mode():
+            self.gpu_id = self._rank % num_gpus
 
         self.num_epochs_per_eval = num_epochs_per_eval
         assert num_epochs_per_param_save % num_epochs_per_eval == 0
@@ -154,11 +233,141 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         import collections
         # self.reward_buffer = collections.deque([-2*10], 10)
 
+    def _get_path_builder_spec(self):
+        """
+        Shape and dtype of the fixed-size per-step entries of a path, so that
+        the path builder can preallocate them.
+        """
+        spec = dict(
+            rewards=((1,), np.float64),
+            terminals=((1,), np.bool_),
+        )
+        if isinstance(self.action_space, Box):
+            spec['actions'] = (self.action_space.shape, np.float64)
+        if isinstance(self.obs_space, Box):
+            spec['observations'] = (self.obs_space.shape, np.float64)
+            spec['next_observations'] = (self.obs_space.shape, np.float64)
+        if hasattr(self.replay_buffer, 'max_num_blocks'):
+            spec['mask'] = ((self.replay_buffer.max_num_blocks,), np.float64)
+        return spec
+
+    def _new_path_builder(self):
+        return PathBuilder(self.max_path_length, self._path_builder_spec)
+
+    def _init_thread_pools(self):
+        # Guards the replay buffer against concurrent add_path / random_batch
+        # calls from the sampling thread and the training loop.
+        self._replay_buffer_lock = threading.Lock()
+        # Same for the networks (weights and normalizers), which the sampling
+        # thread runs forward while the training loop updates them.
+        self._networks_lock = threading.Lock()
+        self._sampler_pool = None
+        if self.async_sampling:
+            self._sampler_pool = ThreadPoolExecutor(max_workers=1)
+        # Writes snapshots to disk while training goes on
+        self._io_pool = ThreadPoolExecutor(max_workers=1)
+        self._io_future = None
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        # Locks and thread pools cannot be pickled
+        del d['_replay_buffer_lock']
+        del d['_networks_lock']
+        del d['_sampler_pool']
+        del d['_io_pool']
+        del d['_io_future']
+        return d
+
+    def __setstate__(self, d):
+        # Snapshots saved before env and training_env became properties
+        env = d.pop('env', None)
+        training_env = d.pop('training_env', None)
+        # Attributes that older snapshots do not have
+        d.setdefault('num_envs', 1)
+        d.setdefault('_vec_env', None)
+        d.setdefault('_num_env_step_calls_per_epoch', d['num_env_steps_per_epoch'])
+        d.setdefault('_reward_buf', np.empty(1, dtype=np.float64))
+        d.setdefault('_terminal_buf', np.empty(1, dtype=bool))
+        d.setdefault('_epoch_time_accum', defaultdict(float))
+        d.setdefault('_last_stamp_time', None)
+        d.setdefault('_previous_eval_time', 0)
+        d.setdefault('_stamp_titles', {})
+        d.setdefault('use_torch_distributed', False)
+        d.setdefault('async_sampling', False)
+        d.setdefault('num_fused_batches', 1)
+        self.__dict__.update(d)
+        if '_path_builder_spec' not in d:
+            self._path_builder_spec = self._get_path_builder_spec()
+            self._current_path_builder = self._new_path_builder()
+            self._vec_path_builders = [self._new_path_builder()]
+        # The loading process may have another rank
+        self._rank = get_rank()
+        self._is_rank0 = self._rank == 0
+        if env is not None:
+            self.env = env
+        if training_env is not None:
+            self.training_env = training_env
+        self._init_thread_pools()
+
+    @property
+    def env(self):
+        return self._env
+
+    @env.setter
+    def env(self, env):
+        self._env = env
+        # Resolved once per env, evaluation statistics are computed per block
+        # if set
+        self._num_blocks = getattr(env.unwrapped, "num_blocks", None)
+
+    @property
+    def training_env(self):
+        return self._training_env
+
+    @training_env.setter
+    def training_env(self, env):
+        self._training_env = env
+        if getattr(self, '_vec_env', None) is not None:
+            # E.g. scripts/resume_training_with_new_env.py, the vectorized env
+            # must step the new env too.
+            self._vec_env = SyncVectorEnv([env] + [
+                copy.deepcopy(env) for _ in range(self.num_envs - 1)
+            ])
+            self._vec_path_builders = [
+                self._new_path_builder() for _ in range(self.num_envs)
+            ]
+        # The mask depends on the number of blocks of the training env
+        self._cached_mask = None
+        # Decide once whether to render, instead of checking on every step
+        if self.render:
+            self._step_training_env = self._render_and_step_training_env
+        else:
+            self._step_training_env = env.step
+
+    def _render_and_step_training_env(self, action):
+        self.training_env.render()
+        return self.training_env.step(action)
+
+    def _get_exploration_mask(self):
+        """
+        The mask only changes when the training env is swapped, so compute it
+        once instead of on every env step.
+        """
+        if self._cached_mask is None:
+            self._cached_mask = get_masks(self.training_env.unwrapped.num_blocks, self.replay_buffer.max_num_blocks, 1)
+        return self._cached_mask
+
     def train(self, start_epoch=0):
+        if ptu.get_mode() == "gpu_opt":
+            # Move the models to the assigned GPU once and keep them there.
+            # Only the mini-batches cross PCIe during training.
+            ptu.set_device(device_id=self.gpu_id, device_type="gpu")
+            self.to(device=torch.device(F"cuda:{self.gpu_id}"))
         self.pretrain()
-        if start_epoch == 0 and MPI and MPI.COMM_WORLD.Get_rank() == 0:
+        if (start_epoch == 0 and self._is_rank0
+                and logger.will_save_itr_params(-1)):
             params = self.get_epoch_snapshot(-1)
-            logger.save_itr_params(-1, params)
+            self._save_in_background(logger.save_itr_params, -1, params)
         self.training_mode(False)
         self._n_env_steps_total = start_epoch * self.num_env_steps_per_epoch
         gt.reset()
@@ -171,12 +380,13 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             raise TypeError("Invalid collection_mode: {}".format(
                 self.collection_mode
             ))
+        self._wait_for_saves()
 
     def pretrain(self):
         pass
 
     def train_online(self, start_epoch=0):
-        self._current_path_builder = PathBuilder()
+        self._current_path_builder = self._new_path_builder()
         for epoch in gt.timed_for(
                 range(start_epoch, self.num_epochs),
                 save_itrs=True,
@@ -184,20 +394,20 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             self._start_epoch(epoch)
             set_to_train_mode(self.training_env)
             observation = self._start_new_rollout()
-            for _ in range(self.num_env_steps_per_epoch):
+            for _ in range(self._num_env_step_calls_per_epoch):
                 observation = self._take_step_in_env(observation)
-                gt.stamp('sample')
+                self._stamp('sample')
 
                 self._try_to_train()
-                gt.stamp('train')
+                self._stamp('train')
 
             set_to_eval_mode(self.env)
             self._try_to_eval(epoch)
-            gt.stamp('eval')
+            self._stamp('eval')
             self._end_epoch(epoch)
 
     def train_batch(self, start_epoch):
-        self._current_path_builder = PathBuilder()
+        self._current_path_builder = self._new_path_builder()
         for epoch in gt.timed_for(
                 range(start_epoch, self.num_epochs),
                 save_itrs=True,
@@ -205,26 +415,50 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             self._start_epoch(epoch)
             set_to_train_mode(self.training_env)
             observation = self._start_new_rollout()
-            # This implementation is rather naive. If you want to (e.g.)
-            # parallelize data collection, this would be the place to do it.50)
-            for _ in range(self.num_env_steps_per_epoch):
-                observation = self._take_step_in_env(observation)
-            gt.stamp('sample')
+            if self.async_sampling:
+                # Step the env in the background while training on the data
+                # that is already in the replay buffer.
+                sampling = self._sampler_pool.submit(
+                    self._timed_take_steps_in_env, observation
+                )
+                self._try_to_train()
+                self._stamp('train')
+                _, sample_time = sampling.result()
+                # The 'sample' stamp only covers the wait for the sampling
+                # thread, its full run time is logged separately.
+                self._stamp('sample')
+                self._epoch_time_accum['background_sample'] = sample_time
+            else:
+                self._take_steps_in_env(observation)
+                self._stamp('sample')
 
-            # self.qf1_optimizer.reinit_flat_operators() #TODO what is this
-            self._try_to_train()
-            gt.stamp('train')
+                # self.qf1_optimizer.reinit_flat_operators() #TODO what is this
+                self._try_to_train()
+                self._stamp('train')
 
             set_to_eval_mode(self.env)
             if epoch % self.num_epochs_per_eval == 0:
                 self._try_to_eval(epoch)
-                gt.stamp('eval')
+                self._stamp('eval')
             self._end_epoch(epoch)
 
+    def _take_steps_in_env(self, observation):
+        for _ in range(self._num_env_step_calls_per_epoch):
+            observation = self._take_step_in_env(observation)
+        return observation
+
+    def _timed_take_steps_in_env(self, observation):
+        start_time = time.time()
+        observation = self._take_steps_in_env(observation)
+        return observation, time.time() - start_time
+
     def _take_step_in_env(self, observation):
-        action, agent_info = self._get_action_and_info(
-            observation,
-        )
+        if self._vec_env is not None:
+            return self._take_step_in_vec_env(observation)
+        with self._networks_lock, ptu.inference_mode():
+            action, agent_info = self._get_action_and_info(
+                observation,
+            )
 
         # TODO: remove
         # self.qf1.pooler.current_time_step += 1
@@ -234,10 +468,8 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         # self.qf2.pooler.max_time_horizon = 50 * 2
         # self.vf.pooler.max_time_horizon = 50 * 2
 
-        if self.render:
-            self.training_env.render()
         next_ob, raw_reward, terminal, env_info = (
-            self.training_env.step(action)
+            self._step_training_env(action)
         )
         # self.reward_buffer.append(raw_reward)
         # if sum(self.reward_buffer) >= 0 and self.policy.selection_attention.hard_block == 0:
@@ -245,58 +477,97 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             # self.qf1.pooler.selection_attention.hard_block = 1
 
         self._n_env_steps_total += 1
-        reward = raw_reward * self.reward_scale
-        terminal = np.array([terminal])
-        reward = np.array([reward])
+        # Reused every step, _handle_step must copy them (the path builder
+        # does) rather than keep a reference.
+        self._reward_buf[0] = raw_reward * self.reward_scale
+        self._terminal_buf[0] = terminal
         self._handle_step(
             observation,
             action,
-            reward,
+            self._reward_buf,
             next_ob,
-            terminal,
+            self._terminal_buf,
             agent_info=agent_info,
             env_info=env_info,
-            mask=get_masks(self.training_env.unwrapped.num_blocks, self.replay_buffer.max_num_blocks, 1)
+            mask=self._get_exploration_mask()
         )
         # print(F"cpb len {len(self._current_path_builder)}")
         # print(F"terminal {terminal}")
         if terminal or len(self._current_path_builder) >= self.max_path_length:
-            self._handle_rollout_ending()
+            with self._replay_buffer_lock:
+                self._handle_rollout_ending()
             new_observation = self._start_new_rollout()
         else:
             new_observation = next_ob
         return new_observation
 
-    def _try_to_train(self):
-        # assert self.alpha_optimizer.param_groups[0]['params'][0]
-        if ptu.get_mode() == "gpu_opt":
-            ptu.set_device(device_id=self.gpu_id, device_type="gpu")
-            self.to(device=torch.device(F"cuda:{self.gpu_id}"))
-            # assert self.alpha_optimizer.m.device.type == "cuda"
+    def _take_step_in_vec_env(self, observations):
+        """
+        Take one step in every env of the vectorized env with a single batched
+        policy forward.
+        :param observations: List with one observation per env.
+        :return: List with the next observation of every env.
+        """
+        with self._networks_lock, ptu.inference_mode():
+            actions, agent_infos = self._get_actions_and_infos(observations)
+        if self.render:
+            self._vec_env.render()
+        next_obs, raw_rewards, terminals, env_infos = (
+            self._vec_env.step(actions)
+        )
+        self._n_env_steps_total += self.num_envs
+        rewards = raw_rewards * self.reward_scale
+        mask = self._get_exploration_mask()
+
+        new_observations = []
+        for i in range(self.num_envs):
+            # Subclasses (e.g. HER) only know about `_current_path_builder`,
+            # so swap in the path builder of env i.
+            self._current_path_builder = self._vec_path_builders[i]
+            self._handle_step(
+                observations[i],
+                actions[i],
+                rewards[i:i + 1],
+                next_obs[i],
+                terminals[i:i + 1],
+                agent_info=agent_infos[i],
+                env_info=env_infos[i],
+                mask=mask
+            )
+            if terminals[i] or len(self._current_path_builder) >= self.max_path_length:
+                with self._replay_buffer_lock:
+                    self._handle_rollout_ending()
+                # The exploration state is shared by all envs
+                self.exploration_policy.reset()
+                new_observations.append(self._vec_env.reset_at(i))
+            else:
+                new_observations.append(next_obs[i])
+            self._vec_path_builders[i] = self._current_path_builder
+        return new_observations
 
-        # assert self.alpha_optimizer.m.device.type == "cuda"
+    def _try_to_train(self):
         if self._can_train():
             self.training_mode(True)
             # assert self.alpha_optimizer.m.device.type == "cuda"
             for i in range(self.num_updates_per_train_call):
-                self._do_training()
+                with self._networks_lock:
+                    self._do_training()
                 # assert self.alpha_optimizer.m.device.type == "cuda"
                 self._n_train_steps_total += 1
             self.training_mode(False)
-        if ptu.get_mode() == "gpu_opt":
-            ptu.set_device(device_type="cpu")
-            self.to(device=torch.device("cpu"))
 
     def _try_to_eval(self, epoch, eval_paths=None):
-        if MPI and MPI.COMM_WORLD.Get_rank() == 0:
+        if self._is_rank0:
             if epoch % self.save_extra_data_interval == 0:
-                logger.save_extra_data(self.get_extra_data_to_save(epoch))
+                self._save_in_background(
+                    logger.save_extra_data, self.get_extra_data_to_save(epoch)
+                )
 
-            if epoch % self.num_epochs_per_param_save == 0:
-                print("Attemping itr param save...")
+            if (epoch % self.num_epochs_per_param_save == 0
+                    and logger.will_save_itr_params(epoch)):
                 params = self.get_epoch_snapshot(epoch)
-                logger.save_itr_params(epoch, params)
-                print(F"Itr{epoch} param saved!")
+                self._save_in_background(logger.save_itr_params, epoch, params)
+                print(F"Itr{epoch} param save queued")
 
         if self._can_evaluate():
             self.evaluate(epoch, eval_paths=eval_paths)
@@ -315,17 +586,9 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             )
 
             times_itrs = gt.get_times().stamps.itrs
-            # train_time = times_itrs['train'][-1]
-            training_loops = ['get_batch', 'update_normalizer', 'forward', 'compute_losses', 'qf1_loop', "policy_loss_forward", 'policy_loop', 'vf_loop']
-            train_time = sum(times_itrs[loop][-1] for loop in times_itrs.keys())
-
-            sample_time = times_itrs['sample'][-1]
-
-            if epoch > 0:
-                eval_time = times_itrs['eval'][-1]
-            else:
-                times_itrs['eval'] = [0] # Need to do this so we can do line 343, the list comprehension
-                eval_time = 0
+            train_time = self._epoch_time_accum['train']
+            sample_time = self._epoch_time_accum['sample']
+            eval_time = self._previous_eval_time
             epoch_time = train_time + sample_time + eval_time
             total_time = gt.get_times().total
 
@@ -339,11 +602,25 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             # logger.record_tabular('Policy Loop (s)', times_itrs['policy_loop'][-1])
             # logger.record_tabular('VF Loop (s)', times_itrs['vf_loop'][-1])
 
-            [logger.record_tabular(key.title(), times_itrs[key][-1]) for key in times_itrs.keys()]
+            for key, times in times_itrs.items():
+                if key in OUTER_LOOP_STAMPS:
+                    continue
+                title = self._stamp_titles.get(key)
+                if title is None:
+                    title = self._stamp_titles[key] = key.title()
+                logger.record_tabular(title, times[-1])
+            logger.record_tabular('Sample', sample_time)
+            logger.record_tabular('Train', train_time)
+            logger.record_tabular('Eval', eval_time)
 
             logger.record_tabular('Train Time (s) ---', train_time)
             logger.record_tabular('(Previous) Eval Time (s) ---', eval_time)
             logger.record_tabular('Sample Time (s) ---', sample_time)
+            if self.async_sampling:
+                logger.record_tabular(
+                    'Background Sample Time (s)',
+                    self._epoch_time_accum['background_sample'],
+                )
             logger.record_tabular('Epoch Time (s)', epoch_time)
             logger.record_tabular('Total Train Time (s)', total_time)
             logger.record_tabular("Epoch", epoch)
@@ -362,6 +639,29 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         else:
             logger.log("Skipping eval for now.")
 
+    def _save_in_background(self, save_fn, *args):
+        """
+        Call `save_fn(*args)` on the I/O thread, so that pickling and writing
+        to disk overlap with training.
+
+        `args` are deep copied first, so that training does not change what
+        gets saved. The networks are copied to the CPU through their
+        `state_dict` and only the filled part of the replay buffer is copied,
+        which is much cheaper than pickling them.
+        """
+        # Keep at most one save in flight (and raise its errors)
+        self._wait_for_saves()
+        memo = {}
+        memo[id(self.replay_buffer)] = self.replay_buffer.get_frozen_copy(memo)
+        self._io_future = self._io_pool.submit(
+            save_fn, *copy.deepcopy(args, memo)
+        )
+
+    def _wait_for_saves(self):
+        if self._io_future is not None:
+            future, self._io_future = self._io_future, None
+            future.result()
+
     def _can_evaluate(self):
         """
         One annoying thing about the logger table is that the keys at each
@@ -394,13 +694,43 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             observation,
         )
 
+    def _get_actions_and_infos(self, observations):
+        """
+        Get one action per env of the vectorized env.
+
+        This default implementation queries the policy once per observation.
+        Override it to do a single batched forward pass.
+        :param observations: List with one observation per env.
+        :return: actions array of shape (num_envs, action_dim), list of
+        agent infos
+        """
+        actions, agent_infos = zip(*[
+            self._get_action_and_info(observation)
+            for observation in observations
+        ])
+        return np.array(actions), list(agent_infos)
+
+    def _stamp(self, name):
+        """
+        gt.stamp(name), also adding the time since the previous stamp to the
+        running total of this epoch.
+        """
+        gt.stamp(name)
+        now = time.time()
+        self._epoch_time_accum[name] += now - self._last_stamp_time
+        self._last_stamp_time = now
+
     def _start_epoch(self, epoch):
         self._epoch_start_time = time.time()
+        self._epoch_time_accum = defaultdict(float)
+        self._last_stamp_time = self._epoch_start_time
         self._exploration_paths = []
         self._do_train_time = 0
         logger.push_prefix('Iteration #%d | ' % epoch)
 
     def _end_epoch(self, epoch):
+        if 'eval' in self._epoch_time_accum:
+            self._previous_eval_time = self._epoch_time_accum['eval']
         logger.log("Epoch Duration: {0}".format(
             time.time() - self._epoch_start_time
         ))
@@ -412,40 +742,26 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
 
     def _start_new_rollout(self):
         self.exploration_policy.reset()
+        if self._vec_env is not None:
+            return self._vec_env.reset()
         return self.training_env.reset()
 
     def _handle_path(self, path):
         """
-        Naive implementation: just loop through each transition.
+        Copy the whole path into the path builder at once, then add it to the
+        replay buffer in one go in `_handle_rollout_ending`.
         :param path:
         :return:
         """
-        for (
-            ob,
-            action,
-            reward,
-            next_ob,
-            terminal,
-            agent_info,
-            env_info
-        ) in zip(
-            path["observations"],
-            path["actions"],
-            path["rewards"],
-            path["next_observations"],
-            path["terminals"],
-            path["agent_infos"],
-            path["env_infos"],
-        ):
-            self._handle_step(
-                ob,
-                action,
-                reward,
-                next_ob,
-                terminal,
-                agent_info=agent_info,
-                env_info=env_info,
-            )
+        self._current_path_builder.bulk_add(
+            observations=path["observations"],
+            actions=path["actions"],
+            rewards=path["rewards"],
+            next_observations=path["next_observations"],
+            terminals=path["terminals"],
+            agent_infos=path["agent_infos"],
+            env_infos=path["env_infos"],
+        )
         self._handle_rollout_ending()
 
     def _handle_step(
@@ -460,7 +776,11 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             # full_observations
     ):
         """
-        Implement anything that needs to happen after every step
+        Implement anything that needs to happen after every step.
+
+        Transitions are only staged in the path builder here. The replay
+        buffer gets the whole path in one `add_path` call when the rollout
+        ends.
         :return:
         """
         self._current_path_builder.add_all(
@@ -473,30 +793,23 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
             env_infos=env_info,
             # full_observations=full_observations,
         )
-        self.replay_buffer.add_sample(
-            observation=observation,
-            action=action,
-            reward=reward,
-            terminal=terminal,
-            next_observation=next_observation,
-            agent_info=agent_info,
-            env_info=env_info,
-            # full_observations=full_observations,
-        )
 
     def _handle_rollout_ending(self):
         """
         Implement anything that needs to happen after every rollout.
         """
-        self.replay_buffer.terminate_episode()
         self._n_rollouts_total += 1
 
         if len(self._current_path_builder) > 0:
             path = self._current_path_builder.get_all_stacked()
+            # add_path takes care of terminating the episode
+            self.replay_buffer.add_path(path)
 
             self._exploration_paths.append(path
             )
-            self._current_path_builder = PathBuilder()
+            self._current_path_builder = self._new_path_builder()
+        else:
+            self.replay_buffer.terminate_episode()
 
     def get_epoch_snapshot(self, epoch):
         data_to_save = dict(
@@ -538,36 +851,32 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         pass
 
     def evaluate(self, epoch, eval_paths=None):
-        statistics = OrderedDict()
+        statistics = {}
         statistics.update(self.eval_statistics)
 
         logger.log("Collecting samples for evaluation")
         if eval_paths:
             test_paths = eval_paths
         else:
-            test_paths = self.get_eval_paths()
-        if hasattr(self.env.unwrapped, "num_blocks"):
-            statistics.update(eval_util.get_generic_path_information(
-                test_paths, stat_prefix="Test", num_blocks=self.env.unwrapped.num_blocks
-            ))
-            if len(self._exploration_paths) > 0:
-                statistics.update(eval_util.get_generic_path_information(
-                    self._exploration_paths, stat_prefix="Exploration"
-                ))
-        else:
+            with ptu.inference_mode():
+                test_paths = self.get_eval_paths()
+        statistics.update(eval_util.get_generic_path_information(
+            test_paths, stat_prefix="Test", num_blocks=self._num_blocks
+        ))
+        if len(self._exploration_paths) > 0:
             statistics.update(eval_util.get_generic_path_information(
-                test_paths, stat_prefix="Test", num_blocks=None
+                self._exploration_paths, stat_prefix="Exploration"
             ))
-            if len(self._exploration_paths) > 0:
-                statistics.update(eval_util.get_generic_path_information(
-                    self._exploration_paths, stat_prefix="Exploration", num_blocks=None
-                ))
         if hasattr(self.env, "log_diagnostics"):
             self.env.log_diagnostics(test_paths, logger=logger)
         if hasattr(self.env, "get_diagnostics"):
             statistics.update(self.env.get_diagnostics(test_paths))
 
         average_returns = eval_util.get_average_returns(test_paths)
+        if self.use_torch_distributed:
+            average_returns_tensor = ptu.tensor([average_returns], dtype=torch.float32)
+            dist.all_reduce(average_returns_tensor, op=dist.ReduceOp.SUM)
+            average_returns = average_returns_tensor.item() / dist.get_world_size()
         statistics['AverageReturn'] = average_returns
         for key, value in statistics.items():
             logger.record_tabular(key, value)
@@ -585,6 +894,18 @@ class RLAlgorithm(metaclass=abc.ABCMeta):
         pass
 
 
+def get_rank():
+    """
+    :return: Rank of this process in the torch.distributed or MPI run, 0 for
+    a single process run.
+    """
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank()
+    if MPI is None:
+        return 0
+    return MPI.COMM_WORLD.Get_rank()
+
+
 def set_to_train_mode(env):
     if hasattr(env, 'train'):
         env.train()
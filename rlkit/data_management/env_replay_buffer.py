@@ -31,6 +31,14 @@ class EnvReplayBuffer(SimpleReplayBuffer):
                 observation, action, reward, terminal, 
                 next_observation, **kwargs)
 
+    def add_path(self, path):
+        if isinstance(self._action_space, Discrete):
+            path = dict(path)
+            path["actions"] = np.eye(self._action_space.n)[
+                np.asarray(path["actions"]).reshape(-1)
+            ]
+        super(EnvReplayBuffer, self).add_path(path)
+
 
 def get_dim(space):
     if isinstance(space, Box):
@@ -21,6 +21,10 @@ class ObsDictRelabelingBuffer(ReplayBuffer):
        *much* easier since you no longer have to worry about termination
        conditions.
     """
+    _sample_attrs = (
+        '_actions', '_terminals', '_obs', '_next_obs', '_masks',
+        '_idx_to_future_obs_idx',
+    )
 
     def __init__(
             self,
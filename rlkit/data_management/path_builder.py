@@ -29,24 +29,78 @@ class PathBuilder(dict):
 
     Note that the key should be "actions" and not "action" since the
     resulting dictionary will have those keys.
+
+    If `max_path_length` and `spec_dict` are given, the keys in `spec_dict`
+    are stored in arrays of shape (max_path_length,) + shape that are
+    allocated on the first sample and written by index, so `get_all_stacked`
+    does not need to stack them. Other keys (e.g. dictionaries of infos) are
+    kept in lists.
     """
 
-    def __init__(self):
+    def __init__(self, max_path_length=None, spec_dict=None):
+        """
+        :param max_path_length:
+        :param spec_dict: Dict mapping key to (shape, dtype) of one element.
+        """
         super().__init__()
         self._path_length = 0
+        self._max_path_length = max_path_length
+        self._spec_dict = spec_dict if max_path_length is not None else None
 
     def add_all(self, **key_to_value):
+        i = self._path_length
         for k, v in key_to_value.items():
             if k not in self:
-                self[k] = [v]
-            else:
+                self._init_storage(k, 1)
+            if isinstance(self[k], list):
                 self[k].append(v)
+            else:
+                if i == len(self[k]):
+                    # Longer than max_path_length, grow the array
+                    self[k] = np.concatenate((self[k], np.empty_like(self[k])))
+                self[k][i] = v
         self._path_length += 1
 
+    def bulk_add(self, **key_to_values):
+        """
+        Same as calling `add_all` for every step, but each value holds the
+        sequence of all steps and is copied with one slice-assign.
+        """
+        lengths = set(len(v) for v in key_to_values.values())
+        assert len(lengths) == 1, "All values need the same number of steps"
+        num_steps = lengths.pop()
+        i = self._path_length
+        for k, v in key_to_values.items():
+            if k not in self:
+                self._init_storage(k, num_steps)
+            if isinstance(self[k], list):
+                self[k].extend(v)
+            else:
+                if i + num_steps > len(self[k]):
+                    self[k] = np.concatenate((
+                        self[k],
+                        np.empty((i + num_steps - len(self[k]),) + self[k].shape[1:], dtype=self[k].dtype),
+                    ))
+                self[k][i:i + num_steps] = v
+        self._path_length += num_steps
+
+    def _init_storage(self, k, num_steps):
+        if self._spec_dict is not None and k in self._spec_dict:
+            shape, dtype = self._spec_dict[k]
+            self[k] = np.empty(
+                (max(self._max_path_length, self._path_length + num_steps),) + tuple(shape),
+                dtype=dtype,
+            )
+        else:
+            self[k] = []
+
     def get_all_stacked(self):
         output_dict = dict()
         for k, v in self.items():
-            output_dict[k] = stack_list(v)
+            if isinstance(v, np.ndarray):
+                output_dict[k] = v[:self._path_length]
+            else:
+                output_dict[k] = stack_list(v)
         return output_dict
 
     def __len__(self):
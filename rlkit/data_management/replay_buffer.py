@@ -1,10 +1,17 @@
 import abc
+import copy
+
+import numpy as np
 
 
 class ReplayBuffer(object, metaclass=abc.ABCMeta):
     """
     A class used to save and replay data.
     """
+    # Attributes with one entry per sample (arrays, dicts of arrays or lists
+    # whose first dimension is the buffer size). Only the first
+    # `num_steps_can_sample()` entries are copied by `get_frozen_copy`.
+    _sample_attrs = ()
 
     @abc.abstractmethod
     def add_sample(self, observation, action, reward, next_observation,
@@ -78,3 +85,55 @@ class ReplayBuffer(object, metaclass=abc.ABCMeta):
         :return:
         """
         pass
+
+    def get_frozen_copy(self, memo=None):
+        """
+        Deep copy that later `add_path` calls do not change, e.g. to pickle the
+        buffer in the background. Only the filled part of the sample storage
+        is copied, the rest is restored (as zeros) when unpickling.
+
+        :param memo: `copy.deepcopy` memo, to share the copies of e.g. the env
+        with other copies.
+        """
+        if memo is None:
+            memo = {}
+        size = self.num_steps_can_sample()
+        num_rows = {}
+        for attr in self._sample_attrs:
+            value = getattr(self, attr)
+            num_rows[attr] = _num_rows(value)
+            memo[id(value)] = _copy_head(value, size)
+        frozen = copy.deepcopy(self, memo)
+        frozen._frozen_num_rows = num_rows
+        return frozen
+
+    def __setstate__(self, d):
+        num_rows = d.pop('_frozen_num_rows', None)
+        self.__dict__.update(d)
+        if num_rows is not None:
+            for attr, n in num_rows.items():
+                setattr(self, attr, _pad_rows(getattr(self, attr), n))
+
+
+def _num_rows(value):
+    if isinstance(value, dict):
+        return _num_rows(next(iter(value.values())))
+    return len(value)
+
+
+def _copy_head(value, size):
+    if isinstance(value, dict):
+        return {k: _copy_head(v, size) for k, v in value.items()}
+    if isinstance(value, list):
+        return value[:size]
+    return value[:size].copy()
+
+
+def _pad_rows(value, num_rows):
+    if isinstance(value, dict):
+        return {k: _pad_rows(v, num_rows) for k, v in value.items()}
+    if isinstance(value, list):
+        return value + [None] * (num_rows - len(value))
+    padded = np.zeros((num_rows,) + value.shape[1:], dtype=value.dtype)
+    padded[:len(value)] = value
+    return padded
@@ -4,6 +4,10 @@ from rlkit.data_management.replay_buffer import ReplayBuffer
 
 
 class SimpleReplayBuffer(ReplayBuffer):
+    _sample_attrs = (
+        '_observations', '_next_obs', '_actions', '_rewards', '_terminals',
+    )
+
     def __init__(
             self, max_replay_buffer_size, observation_dim, action_dim,
     ):
@@ -33,6 +37,22 @@ class SimpleReplayBuffer(ReplayBuffer):
         self._next_obs[self._top] = next_observation
         self._advance()
 
+    def add_path(self, path):
+        """
+        Add a whole path with one slice-assign per field instead of one
+        `add_sample` call per transition.
+        """
+        path_len = len(path["rewards"])
+        indices = (self._top + np.arange(path_len)) % self._max_replay_buffer_size
+        self._observations[indices] = path["observations"]
+        self._actions[indices] = path["actions"]
+        self._rewards[indices] = path["rewards"]
+        self._terminals[indices] = path["terminals"]
+        self._next_obs[indices] = path["next_observations"]
+        self._top = (self._top + path_len) % self._max_replay_buffer_size
+        self._size = min(self._size + path_len, self._max_replay_buffer_size)
+        self.terminate_episode()
+
     def terminate_episode(self):
         pass
 
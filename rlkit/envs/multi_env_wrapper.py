@@ -11,6 +11,9 @@ class MultiEnvWrapperHerTwinSAC(HerTwinSAC):
         """
         :param env_names: List of environment names
         """
+        # The training env is swapped after every rollout, which the
+        # vectorized env does not support.
+        assert kwargs.get('num_envs', 1) == 1, "num_envs > 1 is not supported"
         HerTwinSAC.__init__(self,
             *args,
             her_kwargs=her_kwargs,
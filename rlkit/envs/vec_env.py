@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class SyncVectorEnv(object):
+    """
+    Step a list of environments in lock-step so that a single (batched) policy
+    forward pass can serve all of them.
+
+    Observations are returned as lists since they may be dictionaries (e.g.
+    GoalEnv). Rewards and terminals are stacked into arrays of shape
+    (num_envs,).
+
+    Environments are NOT automatically reset when an episode ends, because the
+    algorithm also truncates paths at `max_path_length`. Call `reset_at` for
+    every env whose rollout has ended.
+    """
+    def __init__(self, envs):
+        assert len(envs) > 0
+        self.envs = envs
+        self.num_envs = len(envs)
+        self.action_space = envs[0].action_space
+        self.observation_space = envs[0].observation_space
+
+    def reset(self):
+        return [env.reset() for env in self.envs]
+
+    def reset_at(self, i):
+        return self.envs[i].reset()
+
+    def step(self, actions):
+        next_obs, rewards, terminals, env_infos = [], [], [], []
+        for env, action in zip(self.envs, actions):
+            next_ob, reward, terminal, env_info = env.step(action)
+            next_obs.append(next_ob)
+            rewards.append(reward)
+            terminals.append(terminal)
+            env_infos.append(env_info)
+        return (
+            next_obs,
+            np.array(rewards),
+            np.array(terminals, dtype=bool),
+            env_infos,
+        )
+
+    def render(self, *args, **kwargs):
+        return self.envs[0].render(*args, **kwargs)
+
+    def __len__(self):
+        return self.num_envs
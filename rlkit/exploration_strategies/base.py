@@ -1,5 +1,7 @@
 import abc
 
+import numpy as np
+
 from rlkit.policies.base import ExplorationPolicy, SerializablePolicy
 
 
@@ -9,7 +11,7 @@ class ExplorationStrategy(object, metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def get_actions(self, t, observation, policy, **kwargs):
+    def get_actions(self, t, policy, *args, **kwargs):
         pass
 
     def reset(self):
@@ -25,9 +27,14 @@ class RawExplorationStrategy(ExplorationStrategy, metaclass=abc.ABCMeta):
         action, agent_info = policy.get_action(*args, **kwargs)
         return self.get_action_from_raw_action(action, t=t), agent_info
 
-    def get_actions(self, t, observation, policy, **kwargs):
-        actions = policy.get_actions(observation)
-        return self.get_actions_from_raw_actions(actions, t=t, **kwargs)
+    def get_actions(self, t, policy, *args, **kwargs):
+        """
+        Batched `get_action`: the noise is drawn separately for every row.
+        """
+        actions, agent_info = policy.get_actions(*args, **kwargs)
+        return np.stack([
+            self.get_action_from_raw_action(action, t=t) for action in actions
+        ]), agent_info
 
     def reset(self):
         pass
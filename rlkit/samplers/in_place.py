@@ -1,5 +1,6 @@
 from rlkit.samplers.util import rollout
 from rlkit.samplers.rollout_functions import multitask_rollout
+import rlkit.torch.pytorch_util as ptu
 import numpy as np
 
 
@@ -30,6 +31,10 @@ class InPlacePathSampler(object):
         pass
 
     def obtain_samples(self, rollout_type="multitask"):
+        with ptu.inference_mode():
+            return self._obtain_samples(rollout_type)
+
+    def _obtain_samples(self, rollout_type):
         paths = []
         n_steps_total = 0
         while n_steps_total + self.max_path_length <= self.max_samples:
@@ -2,7 +2,6 @@ import numpy as np
 import torch
 
 from rlkit.data_management.obs_dict_replay_buffer import ObsDictRelabelingBuffer
-from rlkit.data_management.path_builder import PathBuilder
 from rlkit.torch.ddpg.ddpg import DDPG
 from rlkit.torch.her.her_replay_buffer import RelabelingReplayBuffer
 from rlkit.torch.sac.sac import SoftActorCritic
@@ -100,7 +99,7 @@ class HER(TorchRLAlgorithm):
             path = self._current_path_builder.get_all_stacked() # store path
             self.replay_buffer.add_path(path, curr_num_blocks=self.training_env.unwrapped.num_blocks)
             self._exploration_paths.append(path)
-            self._current_path_builder = PathBuilder()
+            self._current_path_builder = self._new_path_builder()
 
     def _get_action_and_info(self, observation, **kwargs):
         """
@@ -118,7 +117,26 @@ class HER(TorchRLAlgorithm):
         mask = np.ones((1, self.training_env.unwrapped.num_blocks)) # Num_blocks is the MAX num_blocks
         # masks = np.pad(masks, ((0,0), (0, int(self.replay_buffer.max_num_blocks - self.env.unwrapped.num_blocks))), "constant", constant_values=((0,0), (0, 0)))
         kwargs['mask'] = mask
-        return self.exploration_policy.get_action(new_obs, **kwargs)
+        return self.exploration_policy.get_action(self._obs_to_device(new_obs), **kwargs)
+
+    def _get_actions_and_infos(self, observations):
+        """
+        Get one action per env of the vectorized env with a single forward
+        pass of the policy.
+        :param observations: List of observation dicts, one per env.
+        :return:
+        """
+        self.exploration_policy.set_num_steps_total(self._n_env_steps_total)
+        new_obs = np.stack([
+            np.hstack((
+                observation[self.observation_key],
+                observation[self.desired_goal_key],
+            ))
+            for observation in observations
+        ])
+        mask = np.ones((len(observations), self.training_env.unwrapped.num_blocks))
+        actions, agent_info = self.exploration_policy.get_actions(self._obs_to_device(new_obs), mask=mask)
+        return actions, [dict(agent_info) for _ in observations]
 
     def get_eval_paths(self):
         paths = []
@@ -10,6 +10,10 @@ class RelabelingReplayBuffer(EnvReplayBuffer):
     Implementation details:
      - Every sample from [0, self._size] will be valid.
     """
+    _sample_attrs = EnvReplayBuffer._sample_attrs + (
+        '_goals', '_num_steps_left', '_idx_to_future_obs_idx',
+    )
+
     def __init__(
             self,
             max_size,
@@ -2,6 +2,7 @@
 
 import rlkit.torch.optim.util as U
 import torch
+import torch.distributed as dist
 from torch.optim.optimizer import Optimizer
 import math
 import numpy as np
@@ -36,6 +37,10 @@ class MpiAdam(Optimizer):
             assert gpu_id is not None
             self.m = torch.zeros(total_params, dtype=torch.float32).to(device=F"cuda:{gpu_id}")
             self.v = torch.zeros(total_params, dtype=torch.float32).to(device=F"cuda:{gpu_id}")
+        elif ptu.get_mode() == "gpu" and _dist_initialized():
+            # One process per GPU, models stay resident on ptu.device
+            self.m = ptu.zeros(total_params, dtype=torch.float32)
+            self.v = ptu.zeros(total_params, dtype=torch.float32)
         elif not ptu.get_mode(): #CPU is false
             self.m = torch.zeros(total_params, dtype=torch.float32)
             self.v = torch.zeros(total_params, dtype=torch.float32)
@@ -98,20 +103,28 @@ class MpiAdam(Optimizer):
         localg = U.get_flattened_grads(self.param_groups)
         if self.t % 100 == 0:
             self.check_synced()
-        if localg.device.type == "cpu":
-            localg = localg.detach().numpy()
-        else:
-            localg = localg.cpu().detach().numpy()
-        if self.comm is not None:
-            globalg = np.zeros_like(localg)
-            self.comm.Allreduce(localg, globalg, op=MPI.SUM)
+        if _dist_initialized():
+            # All-reduce on the device the grads live on (NCCL for GPUs), no
+            # round trip through host memory.
+            globalg = localg.detach().clone()
+            dist.all_reduce(globalg, op=dist.ReduceOp.SUM)
             if self.scale_grad_by_procs:
-                globalg /= self.comm.Get_size()
-            if localg.shape[0] > 1 and self.comm.Get_size() > 1:
-                assert not (localg == globalg).all()
-            globalg = ptu.from_numpy(globalg, device=torch.device(ptu.get_device()))
+                globalg /= dist.get_world_size()
         else:
-            globalg = ptu.from_numpy(localg, device=torch.device(ptu.get_device()))
+            if localg.device.type == "cpu":
+                localg = localg.detach().numpy()
+            else:
+                localg = localg.cpu().detach().numpy()
+            if self.comm is not None:
+                globalg = np.zeros_like(localg)
+                self.comm.Allreduce(localg, globalg, op=MPI.SUM)
+                if self.scale_grad_by_procs:
+                    globalg /= self.comm.Get_size()
+                if localg.shape[0] > 1 and self.comm.Get_size() > 1:
+                    assert not (localg == globalg).all()
+                globalg = ptu.from_numpy(globalg, device=torch.device(ptu.get_device()))
+            else:
+                globalg = ptu.from_numpy(localg, device=torch.device(ptu.get_device()))
 
         self.t += 1
         a = self.lr * math.sqrt(1 - self.beta2**self.t)/(1 - self.beta1**self.t)
@@ -120,11 +133,18 @@ class MpiAdam(Optimizer):
         step_update = (- a) * self.m / (torch.sqrt(self.v) + self.epsilon)
         # print("before: ")
         # print(self.get_params_as_flat())
-        self.set_params_from_flat((self.get_flat_params() + step_update).to(device=torch.device("cpu")))
+        # Stays on the device of the params, SetFromFlat copies in place
+        with torch.no_grad():
+            self.set_params_from_flat(self.get_flat_params() + step_update)
         # print("after, in mpi adam: ")
         # print(self.get_params_as_flat())
 
     def sync(self):
+        if _dist_initialized():
+            theta = self.get_params_as_flat().detach().clone()
+            dist.broadcast(theta, src=0)
+            self.set_params_from_flat(theta)
+            return
         if self.comm is None:
             return
         theta = ptu.get_numpy(self.get_params_as_flat())
@@ -133,6 +153,15 @@ class MpiAdam(Optimizer):
 
     def check_synced(self):
         # If this fails on iteration 0, remember to call SYNC for each optimizer!!!
+        # Exact comparison holds with the update on the GPU too: every process
+        # applies the same elementwise update to the same all-reduced gradient,
+        # and the former host round trip did not change any value.
+        if _dist_initialized():
+            thetalocal = self.get_params_as_flat().detach().clone()
+            thetaroot = thetalocal.clone()
+            dist.broadcast(thetaroot, src=0)
+            assert torch.equal(thetaroot, thetalocal), (thetaroot, thetalocal)
+            return
         if self.comm is None:
             return
         if self.comm.Get_rank() == 0: # this is root
@@ -155,4 +184,8 @@ class MpiAdam(Optimizer):
         Get params from a CPU thread
         :return:
         """
-        return torch.cat([param.view([U.num_elements(param)]) for param in U.get_flat_params(self.param_groups)], dim=0)
\ No newline at end of file
+        return torch.cat([param.view([U.num_elements(param)]) for param in U.get_flat_params(self.param_groups)], dim=0)
+
+
+def _dist_initialized():
+    return dist.is_available() and dist.is_initialized()
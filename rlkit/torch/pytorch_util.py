@@ -105,6 +105,29 @@ def from_numpy(*args, device=None, **kwargs):
         return torch.from_numpy(*args, **kwargs).float().to(device)
 
 
+def from_numpy_pinned(np_array):
+    """
+    Like `from_numpy`, but on the GPU the copy goes through page-locked memory
+    and does not block the host.
+    """
+    if _use_gpu and torch.cuda.is_available():
+        pinned = torch.empty(np_array.shape, dtype=torch.float32, pin_memory=True)
+        pinned.copy_(torch.from_numpy(np_array))
+        return pinned.to(get_device(), non_blocking=True)
+    return torch.from_numpy(np_array).float().to(get_device())
+
+
+def inference_mode():
+    """
+    Context manager for policy forwards that never need gradients.
+    torch.inference_mode also skips version counter bookkeeping, but it only
+    exists from torch 1.9 on. Fall back to torch.no_grad before that.
+    """
+    if hasattr(torch, "inference_mode"):
+        return torch.inference_mode()
+    return torch.no_grad()
+
+
 def get_numpy(tensor):
     return tensor.to('cpu').detach().numpy()
 
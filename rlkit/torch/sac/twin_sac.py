@@ -101,7 +101,7 @@ class TwinSAC(TorchRLAlgorithm):
                 self.target_entropy = target_entropy
             else:
                 self.target_entropy = -np.prod(self.env.action_space.shape).item()  # heuristic value from Tuomas
-            if MPI:
+            if MPI or self.use_torch_distributed:
                 if ptu.get_mode() == "gpu_opt":
                     self.log_alpha = torch.zeros(1, dtype=torch.float32, requires_grad=True, device=F"cuda:{self.gpu_id}")
                 else:
@@ -179,7 +179,10 @@ class TwinSAC(TorchRLAlgorithm):
         # Enable zero'ing out observation for debugging purposes
         # TODO: zero goals too?
         if self.zero_observation_in_take_step:
-            observation[self.observation_key] = np.zeros_like(observation[self.observation_key])
+            # One observation per env with the vectorized env
+            observations = observation if isinstance(observation, list) else [observation]
+            for ob in observations:
+                ob[self.observation_key] = np.zeros_like(ob[self.observation_key])
         return super()._take_step_in_env(observation)
 
     def _do_training(self):
@@ -2,6 +2,7 @@ import abc
 from typing import Iterable
 
 import numpy as np
+import torch
 
 from rlkit.core.rl_algorithm import RLAlgorithm
 from rlkit.torch import pytorch_util as ptu
@@ -9,9 +10,50 @@ from rlkit.torch.core import PyTorchModule
 
 
 class TorchRLAlgorithm(RLAlgorithm, metaclass=abc.ABCMeta):
+    # Reused by _obs_to_device
+    _obs_host = None
+    _obs_dev = None
+    # Batches left over from the last fused replay buffer sample, and the
+    # number of updates left in the current _try_to_train call
+    _fused_batches = ()
+    _num_updates_left = 0
+
+    def _try_to_train(self):
+        self._num_updates_left = self.num_updates_per_train_call
+        super()._try_to_train()
+        # Never train on batches sampled before the newest paths were added
+        self._fused_batches = ()
+        self._num_updates_left = 0
+
     def get_batch(self):
-        batch = self.replay_buffer.random_batch(self.batch_size)
-        return np_to_pytorch_batch(batch)
+        if self.num_fused_batches <= 1:
+            with self._replay_buffer_lock:
+                batch = self.replay_buffer.random_batch(self.batch_size)
+            return np_to_pytorch_batch(batch)
+        if not self._fused_batches:
+            self._fused_batches = self._get_fused_batches(
+                max(1, min(self.num_fused_batches, self._num_updates_left))
+            )
+        self._num_updates_left -= 1
+        return self._fused_batches.pop()
+
+    def _get_fused_batches(self, k):
+        """
+        Sample `k` batches with one replay buffer call and one host to device
+        copy per key.
+
+        Batches take every k-th row rather than contiguous chunks, because
+        relabeling buffers put the rollout/env/future goals in consecutive
+        blocks of the sample. The rows are copied to contiguous tensors, since
+        callers `view` them (e.g. the masks in CompositeNormalizer.update).
+        """
+        with self._replay_buffer_lock:
+            batch = self.replay_buffer.random_batch(k * self.batch_size)
+        batch = np_to_pytorch_batch(batch)
+        return [
+            {key: value[i::k].contiguous() for key, value in batch.items()}
+            for i in range(k)
+        ]
 
     @property
     @abc.abstractmethod
@@ -22,6 +64,35 @@ class TorchRLAlgorithm(RLAlgorithm, metaclass=abc.ABCMeta):
         for net in self.networks:
             net.train(mode)
 
+    def _obs_to_device(self, obs_np):
+        """
+        Copy an observation to the GPU through a pinned host buffer and a
+        device buffer that are only allocated once, instead of allocating a
+        new tensor every env step. On the CPU the array is returned as is.
+
+        The returned tensor is overwritten by the next call, so it must be
+        consumed (e.g. by a policy forward) before then.
+        """
+        if ptu.device is None or ptu.device.type != "cuda":
+            return obs_np
+        if (
+                self._obs_dev is None
+                or self._obs_dev.shape != obs_np.shape
+                or self._obs_dev.device != ptu.device
+        ):
+            self._obs_host = torch.empty(obs_np.shape, dtype=torch.float32, pin_memory=True)
+            self._obs_dev = torch.empty_like(self._obs_host, device=ptu.device)
+        self._obs_host.copy_(torch.from_numpy(obs_np))
+        self._obs_dev.copy_(self._obs_host, non_blocking=True)
+        return self._obs_dev
+
+    def __getstate__(self):
+        d = super().__getstate__()
+        d.pop('_obs_host', None)
+        d.pop('_obs_dev', None)
+        d.pop('_fused_batches', None)
+        return d
+
     def to(self, device=None):
         if device is None:
             device = ptu.device
@@ -34,7 +105,7 @@ def _elem_or_tuple_to_variable(elem_or_tuple):
         return tuple(
             _elem_or_tuple_to_variable(e) for e in elem_or_tuple
         )
-    return ptu.from_numpy(elem_or_tuple).float()
+    return ptu.from_numpy_pinned(elem_or_tuple)
 
 
 def _filter_batch(np_batch):
@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+from rlkit.data_management.path_builder import PathBuilder
+
+
+SPEC = dict(
+    rewards=((1,), np.float64),
+    terminals=((1,), np.bool_),
+    actions=((2,), np.float64),
+)
+
+
+def make_step(t):
+    return dict(
+        rewards=np.array([t], dtype=np.float64),
+        terminals=np.array([t % 2 == 0]),
+        actions=np.array([t, -t], dtype=np.float64),
+        agent_infos={'t': t},
+    )
+
+
+class TestPathBuilder(unittest.TestCase):
+    def test_spec_keys_are_preallocated(self):
+        builder = PathBuilder(5, SPEC)
+        builder.add_all(**make_step(0))
+        self.assertIsInstance(builder['rewards'], np.ndarray)
+        self.assertEqual(builder['rewards'].shape, (5, 1))
+        self.assertEqual(builder['actions'].shape, (5, 2))
+        # Keys that are not in the spec are kept in lists
+        self.assertIsInstance(builder['agent_infos'], list)
+        self.assertEqual(len(builder), 1)
+
+    def test_without_spec_everything_is_a_list(self):
+        builder = PathBuilder()
+        builder.add_all(**make_step(0))
+        for value in builder.values():
+            self.assertIsInstance(value, list)
+
+    def test_matches_stacked_lists(self):
+        steps = [make_step(t) for t in range(4)]
+        builder = PathBuilder(5, SPEC)
+        list_builder = PathBuilder()
+        for step in steps:
+            builder.add_all(**step)
+            list_builder.add_all(**step)
+        path = builder.get_all_stacked()
+        list_path = list_builder.get_all_stacked()
+        self.assertEqual(set(path), set(list_path))
+        for key in SPEC:
+            expected = np.array([step[key] for step in steps])
+            self.assertEqual(path[key].shape, expected.shape)
+            self.assertEqual(path[key].dtype, expected.dtype)
+            np.testing.assert_array_equal(path[key], expected)
+            np.testing.assert_array_equal(path[key], list_path[key])
+        self.assertEqual(path['agent_infos'], list_path['agent_infos'])
+
+    def test_grows_past_max_path_length(self):
+        steps = [make_step(t) for t in range(7)]
+        builder = PathBuilder(3, SPEC)
+        for step in steps:
+            builder.add_all(**step)
+        path = builder.get_all_stacked()
+        self.assertEqual(len(builder), 7)
+        self.assertEqual(path['rewards'].shape, (7, 1))
+        np.testing.assert_array_equal(
+            path['actions'], np.array([step['actions'] for step in steps])
+        )
+
+    def test_bulk_add(self):
+        steps = [make_step(t) for t in range(6)]
+        builder = PathBuilder(4, SPEC)
+        builder.add_all(**steps[0])
+        builder.bulk_add(**{
+            key: [step[key] for step in steps[1:]] for key in steps[0]
+        })
+        path = builder.get_all_stacked()
+        self.assertEqual(len(builder), 6)
+        for key in SPEC:
+            np.testing.assert_array_equal(
+                path[key], np.array([step[key] for step in steps])
+            )
+        self.assertEqual(path['agent_infos'], [{'t': t} for t in range(6)])
+
+    def test_bulk_add_needs_equal_lengths(self):
+        builder = PathBuilder(4, SPEC)
+        with self.assertRaises(AssertionError):
+            builder.bulk_add(rewards=np.zeros((2, 1)), actions=np.zeros((3, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from rlkit.data_management.simple_replay_buffer import SimpleReplayBuffer
+
+
+def make_path(start, path_len, observation_dim=2, action_dim=1):
+    steps = np.arange(start, start + path_len, dtype=np.float64)[:, None]
+    return dict(
+        observations=np.tile(steps, (1, observation_dim)),
+        actions=np.tile(steps, (1, action_dim)),
+        rewards=steps,
+        terminals=np.zeros((path_len, 1), dtype=bool),
+        next_observations=np.tile(steps + 1, (1, observation_dim)),
+    )
+
+
+def add_samples(buffer, path):
+    for obs, action, reward, terminal, next_obs in zip(
+            path['observations'], path['actions'], path['rewards'],
+            path['terminals'], path['next_observations'],
+    ):
+        buffer.add_sample(obs, action, reward, terminal, next_obs)
+    buffer.terminate_episode()
+
+
+class TestAddPath(unittest.TestCase):
+    def assert_same_contents(self, buffer, expected):
+        self.assertEqual(buffer._top, expected._top)
+        self.assertEqual(buffer._size, expected._size)
+        for attr in SimpleReplayBuffer._sample_attrs:
+            np.testing.assert_array_equal(
+                getattr(buffer, attr), getattr(expected, attr)
+            )
+
+    def test_matches_add_sample(self):
+        buffer = SimpleReplayBuffer(10, 2, 1)
+        expected = SimpleReplayBuffer(10, 2, 1)
+        for start, path_len in [(0, 3), (10, 4)]:
+            buffer.add_path(make_path(start, path_len))
+            add_samples(expected, make_path(start, path_len))
+        self.assert_same_contents(buffer, expected)
+        self.assertEqual(buffer._top, 7)
+        self.assertEqual(buffer._size, 7)
+
+    def test_wraparound(self):
+        buffer = SimpleReplayBuffer(10, 2, 1)
+        expected = SimpleReplayBuffer(10, 2, 1)
+        for start, path_len in [(0, 8), (100, 5)]:
+            buffer.add_path(make_path(start, path_len))
+            add_samples(expected, make_path(start, path_len))
+        self.assert_same_contents(buffer, expected)
+        self.assertEqual(buffer._top, 3)
+        self.assertEqual(buffer._size, 10)
+        np.testing.assert_array_equal(
+            buffer._rewards[:, 0],
+            [102, 103, 104, 3, 4, 5, 6, 7, 100, 101],
+        )
+
+    def test_fill_exactly_to_max_size(self):
+        buffer = SimpleReplayBuffer(10, 2, 1)
+        buffer.add_path(make_path(0, 4))
+        buffer.add_path(make_path(4, 6))
+        self.assertEqual(buffer._top, 0)
+        self.assertEqual(buffer._size, 10)
+        np.testing.assert_array_equal(buffer._rewards[:, 0], np.arange(10))
+
+    def test_wraparound_when_full(self):
+        buffer = SimpleReplayBuffer(10, 2, 1)
+        expected = SimpleReplayBuffer(10, 2, 1)
+        for start, path_len in [(0, 6), (100, 6), (200, 9)]:
+            buffer.add_path(make_path(start, path_len))
+            add_samples(expected, make_path(start, path_len))
+        self.assert_same_contents(buffer, expected)
+        self.assertEqual(buffer._top, 1)
+        self.assertEqual(buffer._size, 10)
+
+
+class TestFrozenCopy(unittest.TestCase):
+    def test_not_changed_by_later_paths(self):
+        buffer = SimpleReplayBuffer(10, 2, 1)
+        buffer.add_path(make_path(0, 4))
+        frozen = buffer.get_frozen_copy()
+        buffer.add_path(make_path(100, 3))
+        self.assertEqual(frozen._size, 4)
+        self.assertEqual(len(frozen._observations), 4)
+        np.testing.assert_array_equal(frozen._rewards[:, 0], np.arange(4))
+
+    def test_unpickles_to_full_size(self):
+        buffer = SimpleReplayBuffer(10, 2, 1)
+        buffer.add_path(make_path(0, 4))
+        loaded = pickle.loads(pickle.dumps(buffer.get_frozen_copy()))
+        self.assertFalse(hasattr(loaded, '_frozen_num_rows'))
+        for attr in SimpleReplayBuffer._sample_attrs:
+            self.assertEqual(
+                getattr(loaded, attr).shape, getattr(buffer, attr).shape
+            )
+            np.testing.assert_array_equal(
+                getattr(loaded, attr), getattr(buffer, attr)
+            )
+        self.assertEqual(loaded._top, 4)
+        # Keeps working as a buffer
+        loaded.add_path(make_path(4, 8))
+        self.assertEqual(loaded._size, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+from gym.spaces import Box
+
+from rlkit.exploration_strategies.base import (
+    PolicyWrappedWithExplorationStrategy,
+)
+from rlkit.exploration_strategies.epsilon_greedy import EpsilonGreedy
+from rlkit.exploration_strategies.gaussian_strategy import GaussianStrategy
+from rlkit.policies.base import Policy
+
+
+class ZeroPolicy(Policy):
+    """
+    Always outputs zeros, and records the arguments of the last call.
+    """
+    def __init__(self, action_dim):
+        self.action_dim = action_dim
+        self.last_kwargs = None
+
+    def get_action(self, observation, **kwargs):
+        actions, agent_info = self.get_actions(observation[None], **kwargs)
+        return actions[0], agent_info
+
+    def get_actions(self, observations, **kwargs):
+        self.last_kwargs = kwargs
+        return np.zeros((len(observations), self.action_dim)), {}
+
+
+class TestBatchedExplorationStrategy(unittest.TestCase):
+    def setUp(self):
+        self.action_space = Box(low=-1, high=1, shape=(3,), dtype=np.float32)
+        self.policy = ZeroPolicy(3)
+        self.observations = np.zeros((64, 5))
+
+    def test_epsilon_greedy_per_row(self):
+        es = EpsilonGreedy(self.action_space, prob_random_action=0.5)
+        exploration_policy = PolicyWrappedWithExplorationStrategy(
+            es, self.policy,
+        )
+        mask = np.ones((64, 2))
+        actions, agent_info = exploration_policy.get_actions(
+            self.observations, mask=mask,
+        )
+        self.assertEqual(actions.shape, (64, 3))
+        self.assertIs(self.policy.last_kwargs['mask'], mask)
+        self.assertIsInstance(agent_info, dict)
+        # Some rows keep the policy action, some are random
+        random_rows = np.any(actions != 0, axis=1)
+        self.assertTrue(random_rows.any())
+        self.assertFalse(random_rows.all())
+
+    def test_gaussian_noise_per_row(self):
+        es = GaussianStrategy(self.action_space, max_sigma=0.1)
+        exploration_policy = PolicyWrappedWithExplorationStrategy(
+            es, self.policy,
+        )
+        actions, _ = exploration_policy.get_actions(self.observations)
+        self.assertEqual(actions.shape, (64, 3))
+        self.assertFalse(np.allclose(actions[0], actions[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import threading
+import unittest
+
+import numpy as np
+
+from rlkit.torch.torch_rl_algorithm import TorchRLAlgorithm
+
+
+class CountingReplayBuffer(object):
+    """
+    Returns rows 0, 1, 2, ... so that the rows of every batch can be traced
+    back, and counts the `random_batch` calls.
+    """
+    def __init__(self, num_blocks):
+        self.num_blocks = num_blocks
+        self.num_calls = 0
+
+    def random_batch(self, batch_size):
+        self.num_calls += 1
+        rows = np.arange(batch_size, dtype=np.float64)[:, None]
+        return dict(
+            observations=np.tile(rows, (1, 4)),
+            rewards=rows,
+            terminals=np.zeros((batch_size, 1), dtype=bool),
+            masks=np.tile(rows, (1, self.num_blocks)),
+        )
+
+
+class FusedBatchAlgorithm(object):
+    """
+    Just the parts of TorchRLAlgorithm that draw fused batches.
+    """
+    get_batch = TorchRLAlgorithm.get_batch
+    _get_fused_batches = TorchRLAlgorithm._get_fused_batches
+
+    def __init__(self, num_fused_batches, batch_size, num_updates):
+        self.num_fused_batches = num_fused_batches
+        self.batch_size = batch_size
+        self.replay_buffer = CountingReplayBuffer(num_blocks=3)
+        self._replay_buffer_lock = threading.Lock()
+        self._fused_batches = ()
+        self._num_updates_left = num_updates
+
+
+class TestFusedBatches(unittest.TestCase):
+    def test_masks_can_be_viewed(self):
+        algo = FusedBatchAlgorithm(num_fused_batches=4, batch_size=8, num_updates=4)
+        for _ in range(4):
+            batch = algo.get_batch()
+            masks = batch['masks']
+            self.assertTrue(masks.is_contiguous())
+            # As in CompositeNormalizer.update with reshape_blocks=True
+            N, nB = masks.size()
+            self.assertEqual(masks.view(N * nB).shape[0], 8 * 3)
+        self.assertEqual(algo.replay_buffer.num_calls, 1)
+
+    def test_batches_are_strided_and_disjoint(self):
+        algo = FusedBatchAlgorithm(num_fused_batches=4, batch_size=8, num_updates=4)
+        rows = []
+        for _ in range(4):
+            batch_rows = batch_rows_of(algo.get_batch())
+            self.assertEqual(len(batch_rows), 8)
+            # Every k-th row of the fused sample
+            self.assertTrue(np.all(np.diff(batch_rows) == 4))
+            rows.extend(batch_rows)
+        self.assertEqual(sorted(rows), list(range(32)))
+
+    def test_no_more_batches_than_updates_left(self):
+        algo = FusedBatchAlgorithm(num_fused_batches=4, batch_size=8, num_updates=6)
+        for _ in range(6):
+            algo.get_batch()
+        # 4 + 2 batches, nothing left over for the next train call
+        self.assertEqual(algo.replay_buffer.num_calls, 2)
+        self.assertEqual(len(algo._fused_batches), 0)
+
+
+def batch_rows_of(batch):
+    return batch['rewards'].cpu().numpy()[:, 0].astype(int)
+
+
+if __name__ == '__main__':
+    unittest.main()